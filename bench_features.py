@@ -0,0 +1,96 @@
+"""Benchmark feature encodings: stored frame size, model matrix size and RF fit time.
+
+Measured locally (--n-estimators 10, synthetic bank-shaped rows), the compact
+layouts cut stored size and fit peak memory ('codes' to about 40% of dense,
+'sparse' to about 70%). They do not make fitting faster: fit time is
+about the same for all three, and 'codes' is slightly slower.
+"""
+from src.pipelines.run_features import build_features, to_model_matrix, FEATURE_ENCODINGS
+from sklearn.ensemble import RandomForestClassifier
+import numpy as np
+import pandas as pd
+import argparse
+import logging
+import time
+import tracemalloc
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+
+# Category levels of the UCI Bank Marketing (bank-additional) dataset
+LEVELS = {
+    'job': ['admin.', 'blue-collar', 'entrepreneur', 'housemaid', 'management', 'retired', 'self-employed', 'services', 'student', 'technician', 'unemployed'],
+    'marital': ['divorced', 'married', 'single'],
+    'education': ['basic.4y', 'basic.6y', 'basic.9y', 'high.school', 'illiterate', 'professional.course', 'university.degree'],
+    'default': ['no', 'yes'],
+    'housing': ['no', 'yes'],
+    'loan': ['no', 'yes'],
+    'contact': ['cellular', 'telephone'],
+    'month': ['apr', 'aug', 'dec', 'jul', 'jun', 'mar', 'may', 'nov', 'oct', 'sep'],
+    'day_of_week': ['fri', 'mon', 'thu', 'tue', 'wed'],
+    'poutcome': ['failure', 'nonexistent', 'success'],
+}
+
+def synthetic_bank(rows, seed=42):
+    """Generate a cleaned-bank-shaped frame with random values.
+
+    Args:
+        rows (int): Number of rows.
+        seed (int): RNG seed.
+
+    Returns:
+        pd.DataFrame: Frame with the interim schema (numerics, categoricals, 'y').
+    """
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'age': rng.integers(18, 95, rows),
+        'duration': rng.integers(1, 3600, rows),
+        'campaign': rng.integers(1, 63, rows),
+        'pdays': rng.choice([999, 3, 6], rows, p=[0.96, 0.02, 0.02]),
+        'previous': rng.integers(0, 7, rows),
+        'emp.var.rate': rng.choice([-3.4, -1.8, -0.1, 1.1, 1.4], rows),
+        'cons.price.idx': rng.normal(93.5, 0.6, rows),
+        'cons.conf.idx': rng.normal(-40.5, 4.6, rows),
+        'euribor3m': rng.uniform(0.6, 5.0, rows),
+        'nr.employed': rng.choice([4963.6, 5099.1, 5191.0, 5228.1], rows),
+    })
+    for col, levels in LEVELS.items():
+        df[col] = rng.choice(levels, rows)
+    df['y'] = (rng.random(rows) < 0.11).astype(int)
+    return df
+
+def bench(rows, n_estimators):
+    """Run every encoding once and return one result row per encoding."""
+    raw = synthetic_bank(rows)
+    results = []
+    for encoding in FEATURE_ENCODINGS:
+        df = build_features(raw, encoding=encoding)
+        X, _ = to_model_matrix(df.drop('y', axis=1))
+        rf = RandomForestClassifier(n_estimators=n_estimators, random_state=42, n_jobs=1)
+        tracemalloc.start()
+        start = time.perf_counter()
+        rf.fit(X, df['y'])
+        fit_s = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results.append({
+            'rows': rows,
+            'encoding': encoding,
+            'columns': X.shape[1],
+            'frame_mb': df.memory_usage(deep=True).sum() / 1e6,
+            'matrix_mb': X.memory_usage(deep=True).sum() / 1e6,
+            'fit_peak_mb': peak / 1e6,
+            'fit_s': fit_s,
+        })
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, nargs='+', default=[41188, 200000], help="Row counts (41188 = bank-additional-full)")
+    parser.add_argument('--n-estimators', type=int, default=20)
+    args = parser.parse_args()
+
+    logger.info(f"Benchmarking encodings {FEATURE_ENCODINGS} at rows={args.rows}")
+    table = pd.DataFrame([r for rows in args.rows for r in bench(rows, args.n_estimators)])
+    print("=== Feature Encoding Benchmark ===")
+    print(table.to_string(index=False, float_format=lambda v: f"{v:.2f}"))
@@ -3,38 +3,52 @@ from crewai import Agent, Task, Crew
 from langchain_openai import ChatOpenAI
 from src.models.predict.predict_strategy import predict_strategy
 from src.models.predict.predict_forecast import predict_forecast
+from src.models.model_index import load_latest_model
+from src.agents.strategy_batcher import StrategyBatcher
+from src.utils.config import load_config
 from src.utils.logging_config import setup_logging
-from src.utils.mlflow_utils import setup_mlflow
 import logging
 import joblib
-import mlflow
+import json
+import math
 import os
-from typing import Dict, Optional
+import re
+import time
+from typing import Dict, List, Optional
 
 logger = setup_logging()
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 
+BACKSTORY = 'Expert in bank marketing campaigns, using age/job/marital/duration/campaign/contact/month to predict subscription success and allocate budgets.'
+EXPECTED_OUTPUT = 'Detailed strategy with budget split, considering dataset features like duration and job for high subscription prob.'
+
 class StrategyAgent:
     """Class for generating marketing strategies."""
-    def __init__(self):
+    def __init__(self, batching: Optional[Dict] = None):
         """Initialize agent with models.
         
+        Args:
+            batching (dict): LLM batching settings (enabled, max_batch_size, max_wait,
+                tokens_per_minute, output_tokens_per_record, max_concurrent_batches,
+                result_timeout).
+                Defaults to the 'llm_batching' section of configs/params.yaml.
+        
         Raises:
             ValueError: If model loading fails.
         """
         try:
             logger.info("Initializing Strategy Agent")
-            setup_mlflow("Forecasting")  # Ensure MLflow context
-            logger.debug("MLflow context set for Forecasting")
 
-            # Load RF model
-            self.strategy_model = joblib.load('models/rf_strategy_model.pkl')
+            # Load RF model (latest indexed artifact; pre-index deployments only have the pickle)
+            try:
+                self.strategy_model = load_latest_model('strategy_rf')
+            except FileNotFoundError as e:
+                logger.warning(f"{e}; falling back to models/rf_strategy_model.pkl")
+                self.strategy_model = joblib.load('models/rf_strategy_model.pkl')
             logger.debug("RF model loaded successfully")
 
-            # Initialize Prophet model path (hardcoded based on latest run)
-            self.artifact_path = "mlruns/1/artifacts/prophet_model"  # Update to correct run ID
-            self.forecaster = None  # Load on demand
-            logger.debug(f"Prophet model path set to {self.artifact_path}")
+            # Load Prophet model up front from the model index (joblib, no MLflow deserialization)
+            self.forecaster = self._load_forecaster()
 
             # Create OpenAI LLM object (required for CrewAI)
             openai_key = os.getenv("OPENAI_API_KEY")
@@ -45,6 +59,25 @@ class StrategyAgent:
                 api_key=openai_key
             )
             logger.debug("OpenAI LLM initialized")
+
+            # Optional batching: concurrent generate_strategy calls share one LLM request
+            if batching is None:
+                batching = load_config().get('llm_batching', {})
+            self.batcher = None
+            if batching.get('enabled'):
+                self.batcher = StrategyBatcher(
+                    self._kickoff_batch,
+                    lambda prompts: self.llm.get_num_tokens(BACKSTORY + self._batch_description(prompts)),
+                    max_batch_size=batching.get('max_batch_size', 8),
+                    max_wait=batching.get('max_wait', 0.5),
+                    tokens_per_minute=batching.get('tokens_per_minute'),
+                    output_tokens_per_record=batching.get('output_tokens_per_record', 400),
+                    max_concurrent_batches=batching.get('max_concurrent_batches', 2),
+                )
+                # Upper bound on waiting for one batch, including token-budget queueing
+                self.batch_timeout = batching.get('result_timeout', 300)
+                self.batch_size = batching.get('max_batch_size', 8)
+                logger.info(f"LLM batching enabled: {batching}")
         except FileNotFoundError as e:
             logger.error(f"Model file not found: {e}")
             raise ValueError("Model initialization failed")
@@ -53,22 +86,147 @@ class StrategyAgent:
             raise
 
     def _load_forecaster(self) -> Optional[object]:
-        """Load Prophet model dynamically when needed.
+        """Load the latest Prophet model from the model index.
         
         Returns:
-            Prophet: Loaded model, or None if loading fails.
+            Prophet: Loaded model, or None if no usable artifact is indexed.
         
         Notes:
-            Uses a hardcoded path to avoid search_runs() issues.
+            Resolved through models/model_index.json written by train_forecaster,
+            so no search_runs() call or run path is needed.
         """
-        if self.forecaster is None:
-            try:
-                self.forecaster = mlflow.prophet.load_model(self.artifact_path)
-                logger.debug(f"Prophet model loaded from {self.artifact_path}")
-            except Exception as e:
-                logger.warning(f"Failed to load Prophet model from {self.artifact_path}: {e}. Proceeding without trend data.")
-                self.forecaster = None
-        return self.forecaster
+        try:
+            return load_latest_model('prophet')
+        except Exception as e:
+            logger.error(f"Prophet model unavailable: {e}. Strategies will be served without trend data; run train_forecaster to fix.")
+            return None
+
+    def _make_agent(self) -> Agent:
+        """Build the CrewAI strategy agent."""
+        return Agent(
+            role='Strategy',
+            goal='Generate plan based on dataset features',
+            backstory=BACKSTORY,
+            llm=self.llm
+        )
+
+    def _prepare(self, kwargs: Dict) -> Dict:
+        """Run the models for one profile and build its LLM task description.
+        
+        Args:
+            kwargs (dict): Dataset features as passed to generate_strategy.
+        
+        Returns:
+            dict: {'features', 'success_prob', 'trend', 'task_desc', 'allocation'}.
+        """
+        # Use provided kwargs; fill defaults for missing Bank Marketing features
+        features = {
+            'age': kwargs.get('age', 30),
+            'job': kwargs.get('job', 'admin.'),
+            'marital': kwargs.get('marital', 'single'),
+            'duration': kwargs.get('duration', 500),
+            'campaign': kwargs.get('campaign', 1),
+            'contact': kwargs.get('contact', 'cellular'),
+            'month': kwargs.get('month', 'may'),
+            'education': kwargs.get('education', 'university.degree'),
+            'default': kwargs.get('default', 'no'),
+            'housing': kwargs.get('housing', 'no'),
+            'loan': kwargs.get('loan', 'no'),
+            'pdays': kwargs.get('pdays', 999),
+            'previous': kwargs.get('previous', 0),
+            'poutcome': kwargs.get('poutcome', 'nonexistent'),
+            'emp.var.rate': kwargs.get('emp.var.rate', 1.1),
+            'cons.price.idx': kwargs.get('cons.price.idx', 93.8),
+            'cons.conf.idx': kwargs.get('cons.conf.idx', -40),
+            'euribor3m': kwargs.get('euribor3m', 4.857),
+            'nr.employed': kwargs.get('nr.employed', 5191),
+            'budget': kwargs.get('budget', 10000)  # For allocation, not RF
+        }
+        success_prob = predict_strategy(features, model=self.strategy_model)
+        logger.debug(f"Success probability: {success_prob}")
+
+        future_trend = None
+        if self.forecaster:
+            forecast = predict_forecast(self.forecaster, periods=kwargs.get('duration', 30))
+            future_trend = forecast['yhat'].tail(4).mean()
+            logger.debug(f"Future trend: {future_trend}")
+        else:
+            logger.warning("No trend data available: Prophet model not loaded")
+
+        task_desc = f"Age: {features['age']}, Job: {features['job']}, Marital: {features['marital']}, Duration: {features['duration']}s, Campaign: {features['campaign']}, Contact: {features['contact']}, Month: {features['month']}, Budget: {features['budget']}. Success prob: {success_prob:.2f}, Trend: {future_trend or 'N/A'}."
+
+        # Allocation based on prob
+        allocation = {'primary': features['contact'], 'budget_split': {'primary': int(features['budget'] * 0.6), 'secondary': int(features['budget'] * 0.4)}} if success_prob > 0.5 else {'primary': 'telephone', 'budget_split': {'testing': int(features['budget'] * 0.7), 'low_risk': int(features['budget'] * 0.3)}}
+        return {'features': features, 'success_prob': success_prob, 'trend': future_trend, 'task_desc': task_desc, 'allocation': allocation}
+
+    def _kickoff(self, task_desc: str) -> str:
+        """Run a single-profile CrewAI task and return the strategy text."""
+        agent = self._make_agent()
+        task = Task(description=task_desc, agent=agent, expected_output=EXPECTED_OUTPUT)
+        crew = Crew(agents=[agent], tasks=[task])
+        return str(crew.kickoff())
+
+    @staticmethod
+    def _batch_description(prompts: List[str]) -> str:
+        """Combine per-profile task descriptions into one structured request."""
+        profiles = "\n".join(f"[{i}] {p}" for i, p in enumerate(prompts))
+        return (
+            f"Write a separate marketing strategy for each of the {len(prompts)} customer profiles below. "
+            f"Each strategy must be: {EXPECTED_OUTPUT}\n"
+            'Respond with ONLY a JSON array containing one object per profile: {"id": <profile number>, "strategy": "<strategy text>"}.\n\n'
+            f"{profiles}"
+        )
+
+    @staticmethod
+    def _split_batch(raw: str, count: int) -> List[Optional[str]]:
+        """Parse a batched response into one strategy per profile.
+        
+        Tries fenced code blocks first, then decodes from each '[' in the text,
+        so echoed profile labels like '[0]' before the array are skipped.
+        
+        Args:
+            raw (str): LLM output containing a JSON array of {"id", "strategy"} objects.
+            count (int): Number of profiles sent.
+        
+        Returns:
+            list: Strategy text per profile id; None where the response had no usable entry.
+        """
+        candidates = [m.group(1) for m in re.finditer(r"```(?:json)?\s*(.*?)```", raw, re.DOTALL)]
+        candidates.append(raw)
+        decoder = json.JSONDecoder()
+        for text in candidates:
+            for start in (m.start() for m in re.finditer(r"\[", text)):
+                try:
+                    items, _ = decoder.raw_decode(text, start)
+                except ValueError:
+                    continue
+                if not isinstance(items, list):
+                    continue
+                by_id = {}
+                for item in items:
+                    if isinstance(item, dict) and 'id' in item and 'strategy' in item:
+                        try:
+                            by_id[int(item['id'])] = str(item['strategy'])
+                        except (TypeError, ValueError):
+                            continue
+                if by_id:
+                    return [by_id.get(i) for i in range(count)]
+        return [None] * count
+
+    def _kickoff_batch(self, prompts: List[str]) -> List[Optional[str]]:
+        """Run one CrewAI task covering several profiles (StrategyBatcher run_batch).
+        
+        Profiles missing from the batched response come back as None; the
+        batcher re-queues them so retries stay within the token budget.
+        """
+        agent = self._make_agent()
+        task = Task(
+            description=self._batch_description(prompts),
+            agent=agent,
+            expected_output='JSON array of {"id", "strategy"} objects, one per profile.'
+        )
+        result = Crew(agents=[agent], tasks=[task]).kickoff()
+        return self._split_batch(str(result), len(prompts))
 
     def generate_strategy(self, **kwargs) -> Dict:
         """Generate strategy with predictions, aligned with Bank Marketing dataset.
@@ -80,69 +238,67 @@ class StrategyAgent:
             dict: {'success_prob': float, 'trend': float or None, 'strategy': str, 'allocation': dict}.
         
         Raises:
-            ValueError: If generation fails.
+            ValueError: If generation fails (including a batched request exceeding result_timeout).
+        
+        Notes:
+            With batching enabled the LLM call is shared with other profiles
+            submitted within the batching window.
         """
         try:
             logger.info(f"Generating strategy with features: {kwargs}")
-            
-            # Use provided kwargs; fill defaults for missing Bank Marketing features
-            features = {
-                'age': kwargs.get('age', 30),
-                'job': kwargs.get('job', 'admin.'),
-                'marital': kwargs.get('marital', 'single'),
-                'duration': kwargs.get('duration', 500),
-                'campaign': kwargs.get('campaign', 1),
-                'contact': kwargs.get('contact', 'cellular'),
-                'month': kwargs.get('month', 'may'),
-                'education': kwargs.get('education', 'university.degree'),
-                'default': kwargs.get('default', 'no'),
-                'housing': kwargs.get('housing', 'no'),
-                'loan': kwargs.get('loan', 'no'),
-                'pdays': kwargs.get('pdays', 999),
-                'previous': kwargs.get('previous', 0),
-                'poutcome': kwargs.get('poutcome', 'nonexistent'),
-                'emp.var.rate': kwargs.get('emp.var.rate', 1.1),
-                'cons.price.idx': kwargs.get('cons.price.idx', 93.8),
-                'cons.conf.idx': kwargs.get('cons.conf.idx', -40),
-                'euribor3m': kwargs.get('euribor3m', 4.857),
-                'nr.employed': kwargs.get('nr.employed', 5191),
-                'budget': kwargs.get('budget', 10000)  # For allocation, not RF
-            }
-            success_prob = predict_strategy(features)
-            logger.debug(f"Success probability: {success_prob}")
-
-            # Load forecaster with hardcoded path
-            forecaster = self._load_forecaster()
-            future_trend = None
-            if forecaster:
-                forecast = predict_forecast(self.artifact_path, periods=kwargs.get('duration', 30))
-                future_trend = forecast['yhat'].tail(4).mean()
-                logger.debug(f"Future trend: {future_trend}")
+            prepared = self._prepare(kwargs)
+            if self.batcher:
+                result = self.batcher.submit(prepared['task_desc']).result(timeout=self.batch_timeout)
             else:
-                logger.warning("No trend data available due to Prophet load failure")
-
-            # Agent with backstory and OpenAI LLM object
-            agent = Agent(
-                role='Strategy',
-                goal='Generate plan based on dataset features',
-                backstory='Expert in bank marketing campaigns, using age/job/marital/duration/campaign/contact/month to predict subscription success and allocate budgets.',
-                llm=self.llm
-            )
-            task_desc = f"Age: {features['age']}, Job: {features['job']}, Marital: {features['marital']}, Duration: {features['duration']}s, Campaign: {features['campaign']}, Contact: {features['contact']}, Month: {features['month']}, Budget: {features['budget']}. Success prob: {success_prob:.2f}, Trend: {future_trend or 'N/A'}."
-            task = Task(
-                description=task_desc,
-                agent=agent,
-                expected_output='Detailed strategy with budget split, considering dataset features like duration and job for high subscription prob.'
-            )
-            crew = Crew(agents=[agent], tasks=[task])
-            result = crew.kickoff()
-
-            # Allocation based on prob
-            allocation = {'primary': features['contact'], 'budget_split': {'primary': int(features['budget'] * 0.6), 'secondary': int(features['budget'] * 0.4)}} if success_prob > 0.5 else {'primary': 'telephone', 'budget_split': {'testing': int(features['budget'] * 0.7), 'low_risk': int(features['budget'] * 0.3)}}
+                result = self._kickoff(prepared['task_desc'])
 
-            output = {'success_prob': success_prob, 'trend': future_trend, 'strategy': result, 'allocation': allocation}
-            logger.info(f"Strategy generated with prob {success_prob:.2f}")
+            output = {'success_prob': prepared['success_prob'], 'trend': prepared['trend'], 'strategy': result, 'allocation': prepared['allocation']}
+            logger.info(f"Strategy generated with prob {prepared['success_prob']:.2f}")
             return output
         except Exception as e:
             logger.error(f"Strategy generation error: {e}", exc_info=True)
-            raise ValueError("Strategy generation failed")
\ No newline at end of file
+            raise ValueError("Strategy generation failed")
+
+    def generate_strategies(self, records: List[Dict]) -> List[Dict]:
+        """Generate strategies for many profiles (bulk runs).
+        
+        Args:
+            records (list): One kwargs dict per profile, as for generate_strategy.
+        
+        Returns:
+            list: generate_strategy-style dicts in input order. A profile that
+            fails has 'error' set, with 'strategy' None (and the model fields
+            None too if prediction itself failed).
+        
+        Notes:
+            With batching enabled all prompts are queued at once, so they are
+            grouped into max_batch_size requests under the token budget, and the
+            run waits at most result_timeout per batch overall.
+            Otherwise profiles run one crew each, sequentially.
+        """
+        logger.info(f"Generating strategies for {len(records)} profiles")
+        outputs = []
+        pending = []
+        for record in records:
+            output = {'success_prob': None, 'trend': None, 'strategy': None, 'allocation': None}
+            try:
+                prepared = self._prepare(record)
+                output.update(success_prob=prepared['success_prob'], trend=prepared['trend'], allocation=prepared['allocation'])
+                if self.batcher:
+                    pending.append((output, self.batcher.submit(prepared['task_desc'])))
+                else:
+                    output['strategy'] = self._kickoff(prepared['task_desc'])
+            except Exception as e:
+                logger.error(f"Strategy failed for {record}: {e}")
+                output['error'] = str(e)
+            outputs.append(output)
+
+        if pending:
+            deadline = time.monotonic() + self.batch_timeout * math.ceil(len(pending) / self.batch_size)
+            for output, future in pending:
+                try:
+                    output['strategy'] = future.result(timeout=max(0, deadline - time.monotonic()))
+                except Exception as e:
+                    logger.error(f"Strategy narrative failed: {e!r}")
+                    output['error'] = str(e) or type(e).__name__
+        return outputs
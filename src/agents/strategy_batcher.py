@@ -0,0 +1,173 @@
+"""Batch pending strategy prompts into single LLM requests under a token budget."""
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+
+class TokenBudget:
+    """Sliding 60-second tokens-per-minute limiter.
+
+    acquire() blocks until the request fits in the window. A request larger
+    than the whole budget is let through once the window is empty, so it
+    can never wait forever.
+    """
+    def __init__(self, tokens_per_minute=None):
+        """Create the limiter.
+
+        Args:
+            tokens_per_minute (int): Budget; None or 0 disables limiting.
+        """
+        self.tokens_per_minute = tokens_per_minute
+        self._window = deque()  # (monotonic time, tokens)
+        self._cond = threading.Condition()
+
+    def acquire(self, tokens):
+        """Block until tokens fit in the current minute, then reserve them.
+
+        Args:
+            tokens (int): Estimated tokens for the request.
+        """
+        if not self.tokens_per_minute:
+            return
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                while self._window and now - self._window[0][0] >= 60:
+                    self._window.popleft()
+                used = sum(t for _, t in self._window)
+                if used + tokens <= self.tokens_per_minute or not self._window:
+                    self._window.append((now, tokens))
+                    return
+                wait = 60 - (now - self._window[0][0])
+                logger.debug(f"Token budget exhausted ({used}/{self.tokens_per_minute}), waiting {wait:.1f}s")
+                self._cond.wait(wait)
+
+class StrategyBatcher:
+    """Group strategy prompts submitted within a short window into one LLM call.
+
+    Callers get a Future per prompt. A dispatcher thread collects up to
+    max_batch_size prompts (or whatever arrived within max_wait seconds of
+    the first one), trims the batch to fit the token budget, waits for
+    budget, and hands the batch to run_batch on a small thread pool.
+    Prompts the LLM skipped are queued again, so retries share batches and
+    stay inside the token budget.
+    """
+    def __init__(self, run_batch, count_tokens, max_batch_size=8, max_wait=0.5, tokens_per_minute=None,
+                 output_tokens_per_record=400, max_concurrent_batches=2, max_retries=1):
+        """Start the dispatcher.
+
+        Args:
+            run_batch (callable): run_batch(prompts) -> list with one entry per prompt, in order:
+                the strategy, an Exception, or None if the response skipped that prompt.
+            count_tokens (callable): count_tokens(prompts) -> estimated prompt tokens for that batch.
+            max_batch_size (int): Maximum prompts per LLM request.
+            max_wait (float): Seconds to wait for more prompts after the first arrives.
+            tokens_per_minute (int): Token budget shared by all batches; None disables limiting.
+            output_tokens_per_record (int): Completion tokens reserved per prompt in the budget.
+            max_concurrent_batches (int): LLM requests allowed in flight at once.
+            max_retries (int): Times a skipped prompt is re-queued before its Future fails.
+        """
+        self.run_batch = run_batch
+        self.count_tokens = count_tokens
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.output_tokens_per_record = output_tokens_per_record
+        self.max_retries = max_retries
+        self.budget = TokenBudget(tokens_per_minute)
+        self._pending = queue.Queue()  # (prompt, future, attempt)
+        self._carry = deque()  # Prompts trimmed off the previous batch go first next time
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent_batches, thread_name_prefix="llm-batch")
+        self._dispatcher = threading.Thread(target=self._dispatch, name="llm-batcher", daemon=True)
+        self._dispatcher.start()
+
+    def submit(self, prompt):
+        """Queue a prompt for the next batch.
+
+        Args:
+            prompt (str): Per-record task description.
+
+        Returns:
+            Future: Resolves to the strategy text for this prompt.
+        """
+        future = Future()
+        self._pending.put((prompt, future, 0))
+        return future
+
+    def _estimate(self, batch):
+        """Estimated prompt + reserved completion tokens for a batch."""
+        prompts = [p for p, _, _ in batch]
+        try:
+            prompt_tokens = self.count_tokens(prompts)
+        except Exception as e:
+            # Never let a tokenizer error kill the dispatcher; ~4 chars per token is close enough
+            logger.warning(f"Token count failed ({e}), estimating from length")
+            prompt_tokens = sum(len(p) for p in prompts) // 4
+        return prompt_tokens + self.output_tokens_per_record * len(batch)
+
+    def _collect(self):
+        """Block for the first prompt, then gather more until full or the window closes."""
+        batch = [self._carry.popleft() if self._carry else self._pending.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            if self._carry:
+                batch.append(self._carry.popleft())
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._pending.get(timeout=remaining))
+            except queue.Empty:
+                break
+        # Keep each request within one minute of budget; overflow leads the next batch
+        limit = self.budget.tokens_per_minute
+        while limit and len(batch) > 1 and self._estimate(batch) > limit:
+            self._carry.appendleft(batch.pop())
+        return batch
+
+    def _dispatch(self):
+        """Dispatcher loop: collect, wait for budget, submit to the pool."""
+        while True:
+            batch = []
+            try:
+                batch = self._collect()
+                tokens = self._estimate(batch)
+                self.budget.acquire(tokens)
+                logger.info(f"Dispatching LLM batch of {len(batch)} prompts (~{tokens} tokens)")
+                self._executor.submit(self._run, batch)
+            except Exception as e:
+                # Fail this batch but keep the loop alive for later prompts
+                logger.error(f"LLM batch dispatch failed: {e}", exc_info=True)
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _run(self, batch):
+        """Call run_batch, resolve each prompt's Future and re-queue skipped prompts."""
+        try:
+            strategies = self.run_batch([p for p, _, _ in batch])
+            if len(strategies) != len(batch):
+                raise ValueError(f"run_batch returned {len(strategies)} results for {len(batch)} prompts")
+            retried = 0
+            for (prompt, future, attempt), strategy in zip(batch, strategies):
+                if strategy is None and attempt < self.max_retries:
+                    self._pending.put((prompt, future, attempt + 1))
+                    retried += 1
+                elif strategy is None:
+                    future.set_exception(ValueError(f"No strategy returned after {attempt + 1} attempts"))
+                elif isinstance(strategy, Exception):
+                    future.set_exception(strategy)
+                else:
+                    future.set_result(strategy)
+            if retried:
+                logger.warning(f"LLM batch skipped {retried}/{len(batch)} prompts; re-queued")
+        except Exception as e:
+            logger.error(f"LLM batch of {len(batch)} failed: {e}", exc_info=True)
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
@@ -1,13 +1,17 @@
 """FastAPI app for Strategy Agent with UI."""
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.templating import Jinja2Templates
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware  # Add CORS
 from src.agents.strategy_agent import StrategyAgent
 import mlflow
 from src.utils.mlflow_utils import setup_mlflow
+from src.utils.config import load_config
+from src.utils.job_queue import JobQueue, QueueFullError
 import logging
 import json
+import math
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
@@ -16,6 +20,7 @@ app = FastAPI(title="Marketing Strategist Agent", version="1.0.0")
 agent = StrategyAgent()
 templates = Jinja2Templates(directory="templates")
 setup_mlflow("StrategyAPI")
+jobs_config = load_config().get('jobs', {})
 
 # Add CORS middleware
 app.add_middleware(
@@ -41,57 +46,112 @@ def strategy_form(request: Request):
     """Serve HTML form for strategy inputs."""
     return templates.TemplateResponse("strategy_form.html", {"request": request})
 
+def _build_input_data(data):
+    """Validate a strategy request body and map it to model features.
+
+    Args:
+        data (dict): Parsed JSON body with age, job, marital, duration, campaign, contact, month, budget.
+
+    Returns:
+        dict: Keyword arguments for StrategyAgent.generate_strategy.
+
+    Raises:
+        ValueError: If a field is out of the dataset's range.
+        KeyError: If a required field is missing.
+    """
+    # Validate and convert
+    age = int(data['age'])
+    duration = int(data['duration'])
+    campaign = int(data['campaign'])
+    budget = int(data['budget'])
+
+    # Validation (dataset ranges)
+    if not (18 <= age <= 100):
+        raise ValueError("Age must be 18-100")
+    if not (1 <= duration <= 3600):
+        raise ValueError("Duration must be 1-3600 seconds")
+    if not (1 <= campaign <= 63):
+        raise ValueError("Campaign must be 1-63 contacts")
+    if budget < 1000:
+        raise ValueError("Budget must be at least $1000")
+
+    # Map to model features
+    return {
+        "age": age,
+        "job": data['job'],
+        "marital": data['marital'],
+        "duration": duration,
+        "campaign": campaign,
+        "contact": data['contact'],
+        "month": data['month'],
+        "budget": budget,
+        "education": "university.degree",  # Default
+        "default": "no",
+        "housing": "no",
+        "loan": "no",
+        "pdays": 999,  # Default
+        "previous": 0,
+        "poutcome": "nonexistent",
+        "emp.var.rate": 1.1,
+        "cons.price.idx": 93.8,
+        "cons.conf.idx": -40,
+        "euribor3m": 4.857,
+        "nr.employed": 5191
+    }
+
+def _run_strategy(**input_data):
+    """Generate a strategy and log it to MLflow.
+
+    Args:
+        **input_data: Output of _build_input_data.
+
+    Returns:
+        dict: StrategyAgent.generate_strategy result with plain JSON types, so the
+        sync response and stored job results are identical.
+    """
+    result = agent.generate_strategy(**input_data)
+
+    # Log to MLflow
+    with mlflow.start_run(nested=True):
+        mlflow.log_metric("success_prob", result['success_prob'])
+        mlflow.log_param("age", input_data['age'])
+        mlflow.log_param("budget", input_data['budget'])
+
+    # Model outputs are numpy scalars; convert them explicitly
+    return {
+        'success_prob': float(result['success_prob']),
+        'trend': float(result['trend']) if result['trend'] is not None else None,
+        'strategy': str(result['strategy']),
+        'allocation': result['allocation'],
+    }
+
+job_queue = JobQueue(
+    _run_strategy,
+    db_path=jobs_config.get('db_path', 'data/jobs/strategy_jobs.db'),
+    workers=jobs_config.get('workers', 2),
+    max_depth=jobs_config.get('max_queue_depth', 100),
+    retention=jobs_config.get('retention_hours', 24) * 3600,
+)
+
+@app.on_event("startup")
+def start_job_queue():
+    """Start strategy job workers (re-queues jobs interrupted by a restart)."""
+    job_queue.start()
+
+@app.on_event("shutdown")
+def stop_job_queue():
+    """Let workers finish their current job before exit."""
+    job_queue.stop(timeout=jobs_config.get('shutdown_timeout', 30))
+
 @app.post("/strategy")
 async def get_strategy(request: Request):
     """Generate strategy from JSON POST."""
     try:
         data = await request.json()
-        # Validate and convert
-        age = int(data['age'])
-        duration = int(data['duration'])
-        campaign = int(data['campaign'])
-        budget = int(data['budget'])
-        
-        # Validation (dataset ranges)
-        if not (18 <= age <= 100):
-            return JSONResponse(status_code=422, content={"error": "Age must be 18-100"})
-        if not (1 <= duration <= 3600):
-            return JSONResponse(status_code=422, content={"error": "Duration must be 1-3600 seconds"})
-        if not (1 <= campaign <= 63):
-            return JSONResponse(status_code=422, content={"error": "Campaign must be 1-63 contacts"})
-        if budget < 1000:
-            return JSONResponse(status_code=422, content={"error": "Budget must be at least $1000"})
-        
-        # Map to model features
-        input_data = {
-            "age": age,
-            "job": data['job'],
-            "marital": data['marital'],
-            "duration": duration,
-            "campaign": campaign,
-            "contact": data['contact'],
-            "month": data['month'],
-            "budget": budget,
-            "education": "university.degree",  # Default
-            "default": "no",
-            "housing": "no",
-            "loan": "no",
-            "pdays": 999,  # Default
-            "previous": 0,
-            "poutcome": "nonexistent",
-            "emp.var.rate": 1.1,
-            "cons.price.idx": 93.8,
-            "cons.conf.idx": -40,
-            "euribor3m": 4.857,
-            "nr.employed": 5191
-        }
-        result = agent.generate_strategy(**input_data)
-        
-        # Log to MLflow
-        with mlflow.start_run(nested=True):
-            mlflow.log_metric("success_prob", result['success_prob'])
-            mlflow.log_param("age", age)
-            mlflow.log_param("budget", budget)
+        input_data = _build_input_data(data)
+        # Generation blocks (LLM call, or waiting for a shared batch); run it off the event loop
+        # so concurrent requests overlap and can land in the same batch
+        result = await run_in_threadpool(_run_strategy, **input_data)
         
         logger.info("Strategy API called via JSON")
         return result
@@ -102,6 +162,41 @@ async def get_strategy(request: Request):
         logger.error(f"Strategy generation error: {e}", exc_info=True)
         return JSONResponse(status_code=500, content={"error": "Internal server error"})
 
+@app.post("/strategy/jobs")
+async def submit_strategy_job(request: Request):
+    """Queue strategy generation and return a job id immediately."""
+    try:
+        data = await request.json()
+        input_data = _build_input_data(data)
+        # submit() may wait on SQLite's write lock; keep it off the event loop
+        job_id = await run_in_threadpool(job_queue.submit, input_data)
+        logger.info(f"Strategy job {job_id} queued")
+        return JSONResponse(status_code=202, content={"job_id": job_id, "status": "queued"})
+    except QueueFullError as e:
+        logger.warning(f"Rejecting strategy job: {e}")
+        return JSONResponse(status_code=429, content={"error": "Job queue is full, retry later"},
+                            headers={"Retry-After": str(jobs_config.get('retry_after', 5))})
+    except (ValueError, KeyError) as e:
+        logger.error(f"Validation error: {e}")
+        return JSONResponse(status_code=422, content={"error": str(e)})
+    except Exception as e:
+        logger.error(f"Job submission error: {e}", exc_info=True)
+        return JSONResponse(status_code=500, content={"error": "Internal server error"})
+
+@app.get("/strategy/jobs/{job_id}")
+async def get_strategy_job(job_id: str, wait: float = Query(0, ge=0)):
+    """Return job status and result; wait > 0 long-polls up to that many seconds."""
+    if not math.isfinite(wait):
+        return JSONResponse(status_code=422, content={"error": "wait must be a finite number of seconds"})
+    wait = min(wait, jobs_config.get('max_wait', 30))
+    if wait:
+        job = await job_queue.wait(job_id, wait, interval=jobs_config.get('poll_interval', 0.5))
+    else:
+        job = await run_in_threadpool(job_queue.get, job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"error": f"Unknown job {job_id}"})
+    return job
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,97 @@
+"""Local index of the latest good model artifact per model type."""
+from datetime import datetime, timezone
+import joblib
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+
+INDEX_PATH = 'models/model_index.json'
+
+def _read_index(index_path):
+    """Return the index dict, or {} if it does not exist yet."""
+    try:
+        with open(index_path, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+def _atomic_write(path, write):
+    """Write to a temp file via write(tmp_path), then rename over path."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+def _dump_json(obj, path):
+    """Write obj as indented JSON to path."""
+    with open(path, 'w') as f:
+        json.dump(obj, f, indent=2)
+
+def register_model(model_type, artifact_path, index_path=INDEX_PATH, **metadata):
+    """Record artifact_path as the latest good artifact for model_type.
+
+    Args:
+        model_type (str): Index key (e.g., 'prophet', 'strategy_rf').
+        artifact_path (str): Path to the joblib artifact.
+        index_path (str): Path to the JSON index.
+        **metadata: Extra JSON-serializable fields (e.g., run_id, metrics).
+    """
+    index = _read_index(index_path)
+    index[model_type] = {
+        'path': artifact_path,
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        **metadata,
+    }
+    _atomic_write(index_path, lambda tmp: _dump_json(index, tmp))
+    logger.info(f"Model index updated: {model_type} -> {artifact_path}")
+
+def save_model(model, model_type, artifact_path, index_path=INDEX_PATH, **metadata):
+    """Serialize a fitted model with joblib and register it in the index.
+
+    The artifact is written to a temp file and renamed, so a crash never
+    leaves the index pointing at a partial file.
+
+    Args:
+        model (object): Fitted model (Prophet, sklearn estimator, ...).
+        model_type (str): Index key.
+        artifact_path (str): Destination path.
+        index_path (str): Path to the JSON index.
+        **metadata: Extra fields stored with the index entry.
+    """
+    _atomic_write(artifact_path, lambda tmp: joblib.dump(model, tmp))
+    register_model(model_type, artifact_path, index_path=index_path, **metadata)
+
+def latest_model(model_type, index_path=INDEX_PATH):
+    """Look up the latest registered artifact.
+
+    Args:
+        model_type (str): Index key.
+        index_path (str): Path to the JSON index.
+
+    Returns:
+        dict: Index entry with 'path', 'created_at' and metadata, or None.
+    """
+    return _read_index(index_path).get(model_type)
+
+def load_latest_model(model_type, index_path=INDEX_PATH):
+    """Load the latest registered artifact for model_type.
+
+    Args:
+        model_type (str): Index key.
+        index_path (str): Path to the JSON index.
+
+    Returns:
+        object: Loaded model.
+
+    Raises:
+        FileNotFoundError: If model_type is not in the index or its artifact is missing.
+    """
+    entry = latest_model(model_type, index_path)
+    if entry is None:
+        raise FileNotFoundError(f"No '{model_type}' entry in model index {index_path}")
+    model = joblib.load(entry['path'])
+    logger.info(f"Loaded {model_type} model from {entry['path']}")
+    return model
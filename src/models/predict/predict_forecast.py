@@ -1,17 +1,17 @@
 # src/models/predict/predict_forecast.py
 """Predict future trends using Prophet model."""
 import pandas as pd
-import mlflow
+from src.models.model_index import load_latest_model
 import logging
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 
-def predict_forecast(model_uri, periods=30):
+def predict_forecast(model=None, periods=30):
     """Generate forecast using loaded Prophet model.
     
     Args:
-        model_uri (str): MLflow model URI (e.g., 'mlruns/0/artifacts/prophet_model').
+        model (Prophet): Preloaded model; defaults to the latest 'prophet' in the model index.
         periods (int): Number of periods to forecast.
         
     Returns:
@@ -22,13 +22,14 @@ def predict_forecast(model_uri, periods=30):
         ValueError: If prediction fails.
     """
     try:
-        model = mlflow.prophet.load_model(model_uri)
+        if model is None:
+            model = load_latest_model('prophet')
         future = model.make_future_dataframe(periods=periods)
         forecast = model.predict(future)
         logger.info(f"Forecast generated for {periods} periods")
         return forecast[['ds', 'yhat']]
     except FileNotFoundError as e:
-        logger.error(f"Model not found at {model_uri}: {e}")
+        logger.error(f"Prophet model not found: {e}")
         raise
     except Exception as e:
         logger.error(f"Forecast error: {e}")
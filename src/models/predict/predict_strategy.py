@@ -1,29 +1,39 @@
 """Predict strategy success probability."""
-import joblib
+import numpy as np
 import pandas as pd
+from src.pipelines.run_features import to_model_matrix
+from src.models.model_index import load_latest_model
 import logging
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 
-def predict_strategy(features_dict):
+def predict_strategy(features_dict, model=None):
     """Predict high ROI probability from features.
     
     Args:
         features_dict (dict): Input features (e.g., {'age': 30, 'duration': 500}).
+        model (RandomForestClassifier): Preloaded model; defaults to the latest 'strategy_rf' in the model index.
         
     Returns:
         float: Probability (0-1).
         
     Raises:
-        FileNotFoundError: If model pickle missing.
+        FileNotFoundError: If no model is passed and none is indexed.
         ValueError: If features mismatch.
     """
     try:
-        model = joblib.load('models/rf_strategy_model.pkl')
+        if model is None:
+            model = load_latest_model('strategy_rf')
         features = pd.DataFrame([features_dict])
-        features = pd.get_dummies(features, drop_first=True)
-        features = features.reindex(columns=model.feature_names_in_, fill_value=0)
+        category_levels = getattr(model, 'category_levels_', None)
+        if category_levels:
+            # Model was trained on integer category codes ('codes' encoding)
+            features, _ = to_model_matrix(features, category_levels)
+        else:
+            features = pd.get_dummies(features, drop_first=True)
+        # RF predicts on float32, so cast up front and skip the float64 intermediate
+        features = features.reindex(columns=model.feature_names_in_, fill_value=0).astype(np.float32)
         prob = model.predict_proba(features)[0][1]
         logger.info(f"Predicted success prob: {prob:.4f}")
         return prob
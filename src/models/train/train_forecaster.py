@@ -4,15 +4,17 @@ import pandas as pd
 import mlflow
 from sklearn.metrics import mean_absolute_error
 from src.utils.mlflow_utils import setup_mlflow
+from src.models.model_index import save_model
 from src.utils.logging_config import setup_logging
 
 logger = setup_logging()
 
-def train_forecaster(ts_path='data/time_series/bank_ts.csv'):
+def train_forecaster(ts_path='data/time_series/bank_ts.csv', model_path='models/prophet_model.joblib'):
     """Train Prophet model on time-series data.
     
     Args:
         ts_path (str): Path to TS CSV.
+        model_path (str): Local joblib artifact registered in the model index for fast loading.
         
     Returns:
         Prophet: Fitted model.
@@ -40,12 +42,13 @@ def train_forecaster(ts_path='data/time_series/bank_ts.csv'):
         y_pred = forecast['yhat'].tail(len(test)).values
         mae = mean_absolute_error(test['y'], y_pred)
         
-        with mlflow.start_run():
+        with mlflow.start_run() as run:
             logger.debug("Logging to MLflow")
             mlflow.log_param("model", "Prophet")
             mlflow.log_metric("mae", mae)
             mlflow.prophet.log_model(m, "prophet_model")
         
+        save_model(m, 'prophet', model_path, run_id=run.info.run_id, metrics={'mae': mae})
         logger.info(f"Forecaster trained: MAE={mae:.2f}")
         return m
     except FileNotFoundError as e:
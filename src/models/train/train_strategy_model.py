@@ -8,7 +8,8 @@ from sklearn.metrics import (
 import pandas as pd
 import mlflow
 from src.utils.mlflow_utils import setup_mlflow
-import joblib
+from src.pipelines.run_features import load_features, to_model_matrix, feature_encoding, processed_features_path
+from src.models.model_index import save_model
 import logging
 import seaborn as sns
 import matplotlib.pyplot as plt
@@ -16,11 +17,13 @@ import matplotlib.pyplot as plt
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 
-def train_strategy_model(processed_path='data/processed/processed_bank_features.csv'):
+def train_strategy_model(processed_path=None, features=None):
     """Train RF Classifier and log classification metrics to MLflow.
     
     Args:
-        processed_path (str): Path to processed CSV with 'y' as binary target.
+        processed_path (str): Path to processed CSV (or .pkl for compact encodings) with 'y' as binary target;
+            defaults to the run_features output for features.encoding in params.yaml.
+        features (pd.DataFrame): Already-processed frame from run_features; skips reading processed_path.
         
     Returns:
         RandomForestClassifier: Fitted model.
@@ -31,13 +34,20 @@ def train_strategy_model(processed_path='data/processed/processed_bank_features.
     """
     try:
         setup_mlflow("StrategyModel")
-        df = pd.read_csv(processed_path)
+        if features is None:
+            processed_path = processed_path or processed_features_path(feature_encoding())
+        df = features if features is not None else load_features(processed_path)
         X = df.drop('y', axis=1)  # Features (age, job, etc.)
+        sparse = any(isinstance(dt, pd.SparseDtype) for dt in X.dtypes)
+        # Sparse one-hot is densified to uint8 and category columns become codes; levels are kept for inference
+        X, category_levels = to_model_matrix(X)
+        encoding = 'codes' if category_levels else ('sparse' if sparse else 'dense')
         y = df['y']  # Binary target (subscription yes/no)
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
         
         rf = RandomForestClassifier(n_estimators=100, random_state=42)
         rf.fit(X_train, y_train)
+        rf.category_levels_ = category_levels
         y_pred = rf.predict(X_test)
         
         # Classification Metrics
@@ -59,9 +69,10 @@ def train_strategy_model(processed_path='data/processed/processed_bank_features.
         plt.close()
         
         # Log to MLflow
-        with mlflow.start_run():
+        with mlflow.start_run() as run:
             mlflow.log_param("model", "RFClassifier")
             mlflow.log_param("n_estimators", 100)
+            mlflow.log_param("feature_encoding", encoding)
             mlflow.log_metric("accuracy", acc)
             mlflow.log_metric("precision_macro", precision)
             mlflow.log_metric("recall_macro", recall)
@@ -71,7 +82,8 @@ def train_strategy_model(processed_path='data/processed/processed_bank_features.
             mlflow.log_dict(report, "classification_report.json")  # Full report as artifact
             mlflow.sklearn.log_model(rf, "rf_strategy_model")
         
-        joblib.dump(rf, 'models/rf_strategy_model.pkl')
+        save_model(rf, 'strategy_rf', 'models/rf_strategy_model.pkl', run_id=run.info.run_id,
+                   metrics={'accuracy': acc, 'f1_macro': f1}, feature_encoding=encoding)
         logger.info(f"Strategy model trained: Accuracy={acc:.4f}, Precision={precision:.4f}, Recall={recall:.4f}, F1={f1:.4f}")
         return rf
     except FileNotFoundError as e:
@@ -1,44 +1,138 @@
 """Feature engineering pipeline."""
+import numpy as np
 import pandas as pd
 from sklearn.preprocessing import StandardScaler
+from src.utils.config import load_config
 import logging
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 
-def run_features(interim_path='data/interim/cleaned_bank.csv'):
+CATEGORICAL_COLS = ['job', 'marital', 'education', 'default', 'housing', 'loan', 'contact', 'month', 'day_of_week', 'poutcome']
+FEATURE_ENCODINGS = ('dense', 'sparse', 'codes')
+
+def feature_encoding():
+    """Return the configured feature layout ('features.encoding' in params.yaml, default 'dense')."""
+    return load_config().get('features', {}).get('encoding', 'dense')
+
+def processed_features_path(encoding):
+    """Return where run_features writes (and training reads) features for an encoding."""
+    if encoding == 'dense':
+        return 'data/processed/processed_bank_features.csv'
+    return 'data/processed/processed_bank_features.pkl'
+
+def build_features(df, encoding='dense'):
+    """Encode and scale a cleaned Bank Marketing frame.
+
+    Args:
+        df (pd.DataFrame): Cleaned data (output of ingestion).
+        encoding (str): 'dense' for bool one-hot + float64 numerics (CSV-friendly),
+            'sparse' for sparse uint8 one-hot blocks + float32 numerics (storage only;
+            densified to uint8 for training),
+            'codes' for pandas category columns + float32 numerics.
+
+    Returns:
+        pd.DataFrame: Processed features + target.
+
+    Raises:
+        ValueError: If encoding is unknown.
+    """
+    if encoding not in FEATURE_ENCODINGS:
+        raise ValueError(f"Unknown feature encoding '{encoding}', expected one of {FEATURE_ENCODINGS}")
+    categorical_cols = [c for c in CATEGORICAL_COLS if c in df.columns]
+    if encoding == 'dense':
+        # Encode ALL categoricals to numeric (one-hot)
+        df = pd.get_dummies(df, columns=categorical_cols, drop_first=True)
+    elif encoding == 'sparse':
+        df = pd.get_dummies(df, columns=categorical_cols, drop_first=True, sparse=True, dtype=np.uint8)
+    else:
+        # Categories are stored as small integer codes; levels travel with the dtype
+        df = df.astype({c: 'category' for c in categorical_cols})
+
+    # Derived ROI proxy (numeric)
+    df['ROI'] = df['duration'] / (df['campaign'] + 1)  # Avoid division by zero
+
+    # Select numeric columns for scaling (exclude target 'y')
+    numeric_cols = df.select_dtypes(include=['int64', 'float64']).columns.drop('y', errors='ignore')
+    scaler = StandardScaler()
+    scaled = scaler.fit_transform(df[numeric_cols])
+    if encoding == 'dense':
+        df[numeric_cols] = scaled
+    else:
+        # Assign a fresh frame so the columns take the float32 dtype instead of upcasting back
+        df = df.drop(columns=numeric_cols).join(pd.DataFrame(scaled.astype(np.float32), columns=numeric_cols, index=df.index))
+    return df
+
+def load_features(processed_path):
+    """Load a processed feature file written by run_features.
+
+    Args:
+        processed_path (str): Path to processed CSV (dense) or pickle (sparse/codes).
+
+    Returns:
+        pd.DataFrame: Processed features + target, with dtypes preserved for pickles.
+    """
+    if str(processed_path).endswith('.pkl'):
+        return pd.read_pickle(processed_path)
+    return pd.read_csv(processed_path)
+
+def to_model_matrix(X, category_levels=None):
+    """Convert a feature frame into the layout the RF is fitted on.
+
+    Category columns are replaced by their integer codes. Sparse one-hot
+    columns are densified back to uint8: 'sparse' is a storage layout only,
+    since the scaled numerics are almost never 0 and sparse random-forest
+    fitting is several times slower than dense.
+
+    Args:
+        X (pd.DataFrame): Feature frame without the target.
+        category_levels (dict): Column -> list of levels seen at training time.
+            When None, levels are taken from the frame's category dtypes.
+
+    Returns:
+        tuple: (pd.DataFrame, dict) model-ready frame and the category levels used.
+    """
+    if category_levels is None:
+        category_levels = {c: list(X[c].cat.categories) for c in X.select_dtypes(include='category').columns}
+    if category_levels:
+        # Unseen levels map to -1, which the trees treat as below every known code;
+        # columns absent at inference are left for the caller's reindex to fill
+        X = X.assign(**{c: pd.Categorical(X[c], categories=levels).codes for c, levels in category_levels.items() if c in X.columns})
+    sparse_cols = [c for c in X.columns if isinstance(X[c].dtype, pd.SparseDtype)]
+    if sparse_cols:
+        X = X.astype({c: X[c].dtype.subtype for c in sparse_cols})
+    return X, category_levels
+
+def run_features(interim_path='data/interim/cleaned_bank.csv', encoding=None):
     """Process features from interim data.
-    
+
     Args:
         interim_path (str): Path to interim CSV.
-        
+        encoding (str): Feature layout, one of FEATURE_ENCODINGS; defaults to
+            features.encoding in params.yaml. Compact layouts ('sparse', 'codes')
+            are pickled since CSV drops their dtypes.
+
     Returns:
         pd.DataFrame: Processed features + target.
-        
+
     Raises:
         FileNotFoundError: If interim file missing.
     """
     try:
+        encoding = encoding or feature_encoding()
         df = pd.read_csv(interim_path)
-        # Encode ALL categoricals to numeric (one-hot)
-        categorical_cols = ['job', 'marital', 'education', 'default', 'housing', 'loan', 'contact', 'month', 'day_of_week', 'poutcome']
-        df = pd.get_dummies(df, columns=categorical_cols, drop_first=True)
-        
-        # Derived ROI proxy (numeric)
-        df['ROI'] = df['duration'] / (df['campaign'] + 1)  # Avoid division by zero
-        
-        # Select numeric columns for scaling (exclude target 'y')
-        numeric_cols = df.select_dtypes(include=['int64', 'float64']).columns.drop('y', errors='ignore')
-        scaler = StandardScaler()
-        df[numeric_cols] = scaler.fit_transform(df[numeric_cols])
-        
-        output_path = 'data/processed/processed_bank_features.csv'
-        df.to_csv(output_path, index=False)
-        logger.info(f"Features processed: {df.shape} saved to {output_path}")
+        df = build_features(df, encoding=encoding)
+
+        output_path = processed_features_path(encoding)
+        if encoding == 'dense':
+            df.to_csv(output_path, index=False)
+        else:
+            df.to_pickle(output_path)
+        logger.info(f"Features processed ({encoding}): {df.shape}, {df.memory_usage(deep=True).sum() / 1e6:.1f} MB saved to {output_path}")
         return df
     except FileNotFoundError as e:
         logger.error(f"Interim file not found: {interim_path}")
         raise
     except Exception as e:
         logger.error(f"Feature error: {e}")
-        raise ValueError("Feature engineering failed")
\ No newline at end of file
+        raise ValueError("Feature engineering failed")
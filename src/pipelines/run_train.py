@@ -1,5 +1,6 @@
 """Run full training pipeline."""
 from src.data.ingest_pipeline import ingest_pipeline
+from src.pipelines.run_features import run_features
 from src.models.train.train_forecaster import train_forecaster
 from src.models.train.train_strategy_model import train_strategy_model
 import logging
@@ -15,6 +16,9 @@ if __name__ == "__main__":
         # Ingest data
         df = ingest_pipeline('data/raw/bank.csv')
         
+        # Build features in the layout set by features.encoding (params.yaml)
+        run_features()
+        
         # Train forecaster
         forecaster = train_forecaster()
         
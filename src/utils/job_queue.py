@@ -0,0 +1,250 @@
+"""Durable SQLite-backed job queue with a local worker pool."""
+import asyncio
+import json
+from contextlib import closing
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+
+PENDING_STATUSES = ('queued', 'running')
+FINISHED_STATUSES = ('succeeded', 'failed')
+
+class QueueFullError(Exception):
+    """Raised when the queue already holds max_depth pending jobs."""
+
+class JobQueue:
+    """Persist jobs in SQLite and run them on a pool of worker threads.
+
+    Jobs left 'running' by a previous process are re-queued on start, so
+    accepted work survives a restart. One process should own the workers
+    for a given db file, since start() treats every running job as orphaned.
+    """
+    def __init__(self, handler, db_path='data/jobs/strategy_jobs.db', workers=2, max_depth=100, poll_interval=1.0,
+                 retention=86400):
+        """Configure the queue; call start() to launch workers.
+
+        Args:
+            handler (callable): Called as handler(**payload); a return value that is not
+                JSON-serializable fails the job.
+            db_path (str): SQLite file path.
+            workers (int): Number of worker threads.
+            max_depth (int): Maximum queued + running jobs before submit() rejects.
+            poll_interval (float): Seconds between checks for jobs added by other processes.
+            retention (float): Seconds finished jobs are kept before submit() deletes them.
+        """
+        self.handler = handler
+        self.db_path = db_path
+        self.workers = workers
+        self.max_depth = max_depth
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._threads = []
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, status TEXT NOT NULL, payload TEXT NOT NULL, "
+                "result TEXT, error TEXT, created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status_created ON jobs (status, created_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status_updated ON jobs (status, updated_at)")
+
+    def _connect(self):
+        """Open a connection in autocommit mode; transactions are explicit."""
+        return sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+
+    def start(self):
+        """Re-queue interrupted jobs and launch the worker threads."""
+        with closing(self._connect()) as conn:
+            recovered = conn.execute(
+                "UPDATE jobs SET status = 'queued', updated_at = ? WHERE status = 'running'", (time.time(),)
+            ).rowcount
+        if recovered:
+            logger.info(f"Re-queued {recovered} interrupted jobs")
+        self._stop.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"Job queue started: {self.workers} workers, max depth {self.max_depth}, db {self.db_path}")
+
+    def stop(self, timeout=None):
+        """Signal workers to exit after their current job and wait for them.
+
+        Args:
+            timeout (float): Seconds to wait per worker; None waits indefinitely.
+        """
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        logger.info("Job queue stopped")
+
+    def submit(self, payload):
+        """Store a job and return its id.
+
+        Finished jobs older than the retention period are purged in the same
+        transaction, so the db stays bounded without a separate cleanup task.
+
+        Args:
+            payload (dict): Keyword arguments for the handler.
+
+        Returns:
+            str: Job id.
+
+        Raises:
+            QueueFullError: If max_depth jobs are already pending.
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with closing(self._connect()) as conn:
+            # IMMEDIATE takes the write lock up front so the depth check and insert are atomic
+            conn.execute("BEGIN IMMEDIATE")
+            purged = conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?",
+                (*FINISHED_STATUSES, now - self.retention),
+            ).rowcount
+            depth = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status IN (?, ?)", PENDING_STATUSES
+            ).fetchone()[0]
+            if depth >= self.max_depth:
+                # Keep the purge even when rejecting
+                conn.execute("COMMIT")
+                raise QueueFullError(f"Job queue full ({depth}/{self.max_depth})")
+            conn.execute(
+                "INSERT INTO jobs (id, status, payload, created_at, updated_at) VALUES (?, 'queued', ?, ?, ?)",
+                (job_id, json.dumps(payload), now, now),
+            )
+            conn.execute("COMMIT")
+        with self._cond:
+            self._cond.notify_all()
+        if purged:
+            logger.info(f"Purged {purged} finished jobs older than {self.retention}s")
+        logger.debug(f"Job {job_id} queued (depth {depth + 1}/{self.max_depth})")
+        return job_id
+
+    def get(self, job_id):
+        """Fetch a job's current state.
+
+        Args:
+            job_id (str): Job id.
+
+        Returns:
+            dict: {'job_id', 'status', 'result', 'error', 'created_at', 'updated_at'}, or None if unknown.
+        """
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT id, status, result, error, created_at, updated_at FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            'job_id': row[0],
+            'status': row[1],
+            'result': json.loads(row[2]) if row[2] is not None else None,
+            'error': row[3],
+            'created_at': row[4],
+            'updated_at': row[5],
+        }
+
+    async def wait(self, job_id, timeout, interval=0.5):
+        """Poll until a job finishes or timeout elapses (long-poll).
+
+        Sleeps on the event loop between reads and runs each SQLite read in a
+        worker thread, so waiting clients neither hold server threads nor
+        block the loop behind a write lock.
+
+        Args:
+            job_id (str): Job id.
+            timeout (float): Maximum seconds to wait.
+            interval (float): Seconds between status reads.
+
+        Returns:
+            dict: Latest job state (see get()), or None if unknown.
+        """
+        deadline = time.monotonic() + timeout
+        job = await asyncio.to_thread(self.get, job_id)
+        while job is not None and job['status'] not in FINISHED_STATUSES:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            await asyncio.sleep(min(remaining, interval))
+            job = await asyncio.to_thread(self.get, job_id)
+        return job
+
+    def _claim(self):
+        """Atomically move the oldest queued job to 'running'.
+
+        Returns:
+            tuple: (job_id, payload dict), or None if nothing is queued.
+        """
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id, payload FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is None:
+                conn.execute("ROLLBACK")
+                return None
+            conn.execute("UPDATE jobs SET status = 'running', updated_at = ? WHERE id = ?", (time.time(), row[0]))
+            conn.execute("COMMIT")
+            return row[0], json.loads(row[1])
+
+    def _finish(self, job_id, status, result=None, error=None):
+        """Record a job's outcome.
+
+        Raises:
+            TypeError: If result is not JSON-serializable.
+        """
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, updated_at = ? WHERE id = ?",
+                (status, json.dumps(result) if result is not None else None, error, time.time(), job_id),
+            )
+
+    def _work(self):
+        """Worker loop: claim, run handler, store outcome."""
+        while not self._stop.is_set():
+            try:
+                claimed = self._claim()
+            except sqlite3.Error as e:
+                logger.error(f"Job claim failed: {e}", exc_info=True)
+                claimed = None
+            if claimed is None:
+                with self._cond:
+                    self._cond.wait(self.poll_interval)
+                continue
+            job_id, payload = claimed
+            logger.info(f"Job {job_id} started")
+            try:
+                result = self.handler(**payload)
+            except Exception as e:
+                logger.error(f"Job {job_id} failed: {e}", exc_info=True)
+                self._record(job_id, 'failed', error=str(e))
+            else:
+                self._record(job_id, 'succeeded', result=result)
+
+    def _record(self, job_id, status, result=None, error=None):
+        """Store a job outcome without letting storage errors kill the worker."""
+        try:
+            try:
+                self._finish(job_id, status, result=result, error=error)
+            except (TypeError, ValueError) as e:
+                # Result not JSON-serializable: fail the job rather than store a mangled result
+                logger.error(f"Job {job_id} result not serializable: {e}")
+                status = 'failed'
+                self._finish(job_id, status, error=f"Result not serializable: {e}")
+            logger.info(f"Job {job_id} {status}")
+        except sqlite3.Error as e:
+            logger.error(f"Could not record job {job_id} as {status}: {e}; it stays 'running' until restart", exc_info=True)